@@ -0,0 +1,155 @@
+"""
+AnkiConnect Client
+
+Shared helpers for talking to Anki via the AnkiConnect API, used by both the
+word list script (main.py) and the sentence list script (sentences.py). Also
+caches the processed results on disk so unchanged notes are not fetched again.
+
+Requirements:
+- Anki must be running
+- AnkiConnect addon must be installed in Anki
+"""
+
+import httpx
+import orjson
+import pickle
+import simdjson
+from pathlib import Path
+from typing import List, Dict, Any, Mapping, Optional, Sequence, Tuple
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+ANKI_CONNECT_URL = "http://localhost:8765"
+
+CACHE_DIR = Path.home() / ".cache" / "word-list-grabber"
+
+# Stored with every cache entry; bump this whenever process_words or
+# process_sentences changes what they produce, so old caches are not reused
+CACHE_VERSION = 2
+
+# Shared client so every AnkiConnect call reuses the same keep-alive connection.
+# notesInfo on a big deck can be slow, so requests never time out (as before).
+_CLIENT = httpx.Client(base_url=ANKI_CONNECT_URL, timeout=None)
+
+# Request bodies are serialized with orjson, so the content type is set by hand
+_HEADERS = {"Content-Type": "application/json"}
+
+# Parser for large responses that are only partly read, see invoke(lazy=True)
+_PARSER = simdjson.Parser()
+
+def configure_logging() -> None:
+    """Configure logging with the format shared by the scripts."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    # httpx logs every request at INFO, which requests never did
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+def invoke(action: str, params: Optional[Dict[str, Any]] = None, lazy: bool = False,
+           log_errors: bool = True) -> Any:
+    """
+    Send a request to AnkiConnect API.
+
+    With log_errors unset, an error returned by AnkiConnect is only raised and
+    not logged, for callers that expect it and handle it themselves.
+
+    With lazy set, the result is a simdjson view that only builds Python
+    objects for the values that are read. The parser is shared, so another
+    lazy call raises a RuntimeError while any part of the previous lazy
+    result is still alive.
+    """
+    try:
+        logger.debug(f"Invoking AnkiConnect action: {action} with params: {params}")
+        body = orjson.dumps({
+            "action": action,
+            "version": 6,
+            "params": params or {}
+        })
+        response = _CLIENT.post("", content=body, headers=_HEADERS)
+        response.raise_for_status()
+        result = _PARSER.parse(response.content) if lazy else orjson.loads(response.content)
+
+        if result.get("error"):
+            if log_errors:
+                logger.error(f"AnkiConnect action '{action}' failed: {result['error']}")
+            raise RuntimeError(f"AnkiConnect error: {result['error']}")
+
+        logger.debug(f"AnkiConnect action '{action}' completed successfully")
+        return result["result"]
+    except httpx.ConnectError:
+        logger.error("Failed to connect to AnkiConnect - check if Anki is running with AnkiConnect addon")
+        raise ConnectionError("Could not connect to AnkiConnect. Is Anki running with AnkiConnect addon installed?")
+    except httpx.HTTPError as e:
+        logger.error(f"Request to AnkiConnect failed: {e}")
+        raise RuntimeError(f"Request failed: {e}")
+
+def find_notes(deck_name: str, model_name: str) -> List[int]:
+    """Find all note IDs in the specified deck that use the specified model."""
+    logger.debug(f"Searching for notes in deck: {deck_name} with model: {model_name}")
+    return invoke("findNotes", {"query": f'deck:"{deck_name}" note:"{model_name}"'})
+
+def get_note_info(note_ids: List[int]) -> Sequence[Mapping[str, Any]]:
+    """
+    Get detailed information for the specified notes.
+
+    The notes are returned lazily, so fields that are never read (cards, mod,
+    the other note fields, ...) are not converted to Python objects.
+    """
+    logger.debug(f"Retrieving info for {len(note_ids)} notes")
+    return invoke("notesInfo", {"notes": note_ids}, lazy=True)
+
+def get_notes_mod_time(note_ids: List[int]) -> List[Dict[str, int]]:
+    """
+    Get the modification time for the specified notes.
+
+    Older AnkiConnect versions do not support this action; the RuntimeError
+    raised then is left to the caller to report.
+    """
+    logger.debug(f"Retrieving modification time for {len(note_ids)} notes")
+    return invoke("notesModTime", {"notes": note_ids}, log_errors=False)
+
+def get_notes_cache_key(note_ids: List[int]) -> Tuple[Tuple[int, int], ...]:
+    """
+    Get a cache key made of the ID and modification time of every specified note.
+
+    Notes being added or removed change the note IDs, and a note being edited
+    changes its own modification time, even if it stays older than other notes.
+    Modification times only have one-second resolution, so an edit in the same
+    second as the previous run can still be missed.
+    """
+    mod_times = get_notes_mod_time(note_ids)
+    return tuple(sorted((note["noteId"], note["mod"]) for note in mod_times))
+
+def load_cache(name: str, key: Any) -> Optional[Any]:
+    """Load the data cached under the given name, if it was stored with the given key."""
+    path = CACHE_DIR / f"{name}.pkl"
+    try:
+        with open(path, "rb") as f:
+            cache = pickle.load(f)
+    except FileNotFoundError:
+        logger.debug(f"No cache found at {path}")
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable cache at {path}: {e}")
+        return None
+
+    if cache.get("version") != CACHE_VERSION or cache.get("key") != key:
+        logger.debug(f"Cache at {path} is out of date")
+        return None
+
+    return cache["data"]
+
+def save_cache(name: str, key: Any, data: Any) -> None:
+    """Cache the data under the given name, to be reused while the key stays the same."""
+    path = CACHE_DIR / f"{name}.pkl"
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump({"version": CACHE_VERSION, "key": key, "data": data}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        logger.warning(f"Failed to write cache to {path}: {e}")
@@ -11,142 +11,97 @@ Requirements:
 - The deck "Polish" must exist with "Custom Cloze" model containing "Fill Blank" template
 """
 
-import requests
-from typing import List, Dict, Any, Optional
-from tqdm import tqdm
+from typing import List, Any, Mapping, Sequence
 
 import logging
 
+from anki_client import (
+    configure_logging, find_notes, get_note_info, get_notes_cache_key, load_cache, save_cache
+)
+
 logger = logging.getLogger(__name__)
 
-ANKI_CONNECT_URL = "http://localhost:8765"
+# Fields of the "Custom Cloze" model that make up a sentence, in order
+SENTENCE_FIELDS = (
+    "Words Before",
+    "Cloze Word",
+    "Words Between",
+    "Cloze Word Second Part",
+    "Words After",
+)
 
-def invoke(action: str, params: Optional[Dict[str, Any]] = None) -> Any:
-    """Send a request to AnkiConnect API."""
-    try:
-        logger.debug(f"Invoking AnkiConnect action: {action} with params: {params}")
-        response = requests.post(ANKI_CONNECT_URL, json={
-            "action": action,
-            "version": 6,
-            "params": params or {}
-        })
-        response.raise_for_status()
-        result = response.json()
-        
-        if result.get("error"):
-            logger.error(f"AnkiConnect action '{action}' failed: {result['error']}")
-            raise RuntimeError(f"AnkiConnect error: {result['error']}")
-            
-        logger.debug(f"AnkiConnect action '{action}' completed successfully")
-        return result["result"]
-    except requests.exceptions.ConnectionError:
-        logger.error("Failed to connect to AnkiConnect - check if Anki is running with AnkiConnect addon")
-        raise ConnectionError("Could not connect to AnkiConnect. Is Anki running with AnkiConnect addon installed?")
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Request to AnkiConnect failed: {e}")
-        raise RuntimeError(f"Request failed: {e}")
-
-def find_notes(deck_name: str) -> List[int]:
-    """Find all note IDs in the specified deck."""
-    logger.debug(f"Searching for notes in deck: {deck_name}")
-    return invoke("findNotes", {"query": f'deck:"{deck_name}"'})
-
-def get_note_info(note_ids: List[int]) -> List[Dict[str, Any]]:
-    """Get detailed information for the specified notes."""
-    logger.debug(f"Retrieving info for {len(note_ids)} notes")
-    return invoke("notesInfo", {"notes": note_ids})
-
-def get_model_templates(model_name: str) -> Dict[str, str]:
-    """Get template names and content for a given model."""
-    logger.debug(f"Retrieving templates for model: {model_name}")
-    return invoke("modelTemplates", {"modelName": model_name})
-
-def get_sentences() -> List[Dict[str, Any]]:
+def get_sentences() -> List[str]:
     """
     Main function that enables audio for qualifying cards.
     
-    Returns a list of notes from the Polish deck using the "Sentences" model.
+    Returns the sentences of the notes from the Polish deck using the "Sentences"
+    model. The sentences from the last run are reused if none of the notes
+    changed since.
     """
     try:
         logger.info("Starting audio enablement process for Polish deck")
         
-        # Get the template information for the "Sentences" model
-        logger.debug("Retrieving template information for 'Custom Cloze' model")
-        templates_dict = get_model_templates("Custom Cloze")
-        template_names = list(templates_dict.keys())
-        logger.debug(f"Found templates: {template_names}")
-
-        # Get the order of the "Fill Blank" template in the templates list
-        if "Fill Blank" not in template_names:
-            logger.warning("'Fill Blank' template not found in the 'Sentences' model")
-            return
-            
-        word_template_ord = template_names.index("Fill Blank")
-        logger.debug(f"'Fill Blank' template order: {word_template_ord}")
-        # Get all notes in the Polish deck
-        logger.info("Searching for notes in Polish deck")
-        note_ids = find_notes("Polish")
+        # Get all notes in the Polish deck with the model name "Custom Cloze"
+        logger.info("Searching for 'Custom Cloze' notes in Polish deck")
+        note_ids = find_notes("Polish", "Custom Cloze")
         if not note_ids:
-            logger.warning("No notes found in Polish deck")
-            return
-            
-        logger.info(f"Found {len(note_ids)} notes in Polish deck")
-        notes = get_note_info(note_ids)
-
-        # Get the notes with the model name "Custom Cloze"
-        logger.debug("Filtering notes by 'Custom Cloze' model")
-        notes = [note for note in notes if note["modelName"] == "Custom Cloze"]
-        if not notes:
             logger.warning("No notes found with 'Custom Cloze' model in Polish deck")
             return
 
-        logger.info(f"Found {len(notes)} notes with 'Custom Cloze' model")
+        logger.info(f"Found {len(note_ids)} notes with 'Custom Cloze' model")
+
+        # Reuse the sentences from the last run if none of the notes changed
+        try:
+            cache_key = get_notes_cache_key(note_ids)
+        except RuntimeError as e:
+            logger.warning(f"Could not check for note changes, not using the cache: {e}")
+            cache_key = None
+
+        if cache_key is not None:
+            processed_sentences = load_cache("sentences", cache_key)
+            if processed_sentences is not None:
+                logger.info("Notes unchanged since the last run, using cached sentences")
+                return processed_sentences
 
-        return notes
+        notes = get_note_info(note_ids)
+        processed_sentences = process_sentences(notes)
+        if cache_key is not None:
+            save_cache("sentences", cache_key, processed_sentences)
+
+        return processed_sentences
             
     except Exception as e:
         logger.error(f"Error during audio enablement process: {e}", exc_info=True)
 
-def process_and_store(sentences: List[Dict[str, Any]]) -> None:
-    """Process the sentences and store them in a text file categorized by tags."""
-    processed_sentences = []
-    for sentence in sentences:
-        processed_sentences.append(
-            sentence["fields"]["Words Before"]["value"]
-            + sentence["fields"]["Cloze Word"]["value"]
-            + sentence["fields"]["Words Between"]["value"]
-            + sentence["fields"]["Cloze Word Second Part"]["value"]
-            + sentence["fields"]["Words After"]["value"]
-        )
+def process_sentences(sentences: Sequence[Mapping[str, Any]]) -> List[str]:
+    """Process the sentences into an alphabetically sorted list without duplicates."""
+    # Collect the sentences straight into a set to remove duplicates
+    processed_sentences = {
+        "".join([fields[field]["value"] for field in SENTENCE_FIELDS])
+        for fields in (sentence["fields"] for sentence in sentences)
+    }
 
     # Sort the sentences alphabetically
-    processed_sentences = sorted(processed_sentences)
-
-    # Remove duplicates
-    processed_sentences = list(dict.fromkeys(processed_sentences))
+    return sorted(processed_sentences)
 
-    # Store the sentences in a text file
+def store_sentences(processed_sentences: List[str]) -> None:
+    """Store the sentences in a text file."""
     with open("sentences.txt", "w", encoding="utf-8") as f:
-        for sentence in processed_sentences:
-            f.write(sentence + "\n")
+        f.write("\n".join(processed_sentences) + "\n")
 
 if __name__ == "__main__":
     # Configure logging with more detailed format
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    configure_logging()
     
     # To enable debug logging, uncomment the line below:
-    # logger.setLevel(logging.DEBUG)
+    # logging.getLogger().setLevel(logging.DEBUG)
     
     logger.info("=== Starting Anki Fetch ===")
-    sentences: list[Dict[str, Any]] = get_sentences()
+    sentences: list[str] = get_sentences()
     logger.info("=== End of Anki Fetch ===")
 
     if not sentences:
         logger.warning("No sentences were retrieved from Anki.")
         exit(0)
 
-    process_and_store(sentences)
\ No newline at end of file
+    store_sentences(sentences)
\ No newline at end of file